@@ -1,17 +1,38 @@
 """
 Admin routes for TradingGrow admin dashboard
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, Response, stream_with_context
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import check_password_hash
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
+import hashlib
 from datetime import datetime
+from threading import Lock
+from cachetools import TTLCache, cached
+from sqlalchemy.orm import selectinload
 from models import User, Watchlist, StockScreening, SubscriptionRequest
 from data_service import MarketDataService
-import json
+import numpy as np
+import orjson
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
+# Dashboard payload cache: the underlying data rarely changes between
+# back-to-back admin refreshes, so reuse the built payload for a few seconds
+_dashboard_cache = TTLCache(maxsize=16, ttl=10)
+_dashboard_lock = Lock()
+
+def _invalidate_dashboard_cache():
+    """Drop the cached dashboard payload after admin mutations"""
+    with _dashboard_lock:
+        _dashboard_cache.clear()
+
+def ojsonify(payload, status=200):
+    """jsonify replacement backed by orjson's C serializer"""
+    return Response(orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS),
+                    status=status, mimetype='application/json')
+
 def admin_required(f):
     """Decorator to require admin access"""
     @wraps(f)
@@ -37,12 +58,11 @@ def admin_login():
             password = request.form.get('password')
         
         if email and password:
-            from models import User
             user = User.get_by_email(email)
             if user and user.is_admin and user.check_password(password):
                 login_user(user, remember=True)  # Use remember=True for persistent sessions
                 if request.is_json:
-                    return jsonify({
+                    return ojsonify({
                         'success': True, 
                         'message': 'Admin login successful',
                         'redirect': '/admin/dashboard'
@@ -51,39 +71,27 @@ def admin_login():
             else:
                 error_msg = 'Invalid admin credentials.'
                 if request.is_json:
-                    return jsonify({'success': False, 'error': error_msg}), 401
+                    return ojsonify({'success': False, 'error': error_msg}), 401
                 flash(error_msg, 'error')
         else:
             error_msg = 'Please enter email and password.'
             if request.is_json:
-                return jsonify({'success': False, 'error': error_msg}), 400
+                return ojsonify({'success': False, 'error': error_msg}), 400
             flash(error_msg, 'error')
     
     # Serve React SPA for admin login
     return render_template('spa.html')
 
-@admin_bp.route('/dashboard')
-@admin_required
-def dashboard():
-    """Admin dashboard - serves React SPA with data"""
-    from models import User, StockScreening, SubscriptionRequest
-    from data_service import MarketDataService
-    
-    # Get user statistics
-    all_users = User.get_all_users() or []
-    total_users = len(all_users)
-    admin_users = len([u for u in all_users if u.is_admin])
-    regular_users = total_users - admin_users
-    
-    # Get subscription statistics
-    free_users = len([u for u in all_users if u.subscription_tier == 'free'])
-    medium_users = len([u for u in all_users if u.subscription_tier == 'medium'])
-    pro_users = len([u for u in all_users if u.subscription_tier == 'pro'])
-    
+@cached(_dashboard_cache, lock=_dashboard_lock)
+def _build_admin_dashboard_data():
+    """Build the stats/screenings/requests payload for the admin dashboard"""
+    # Get user and subscription statistics aggregated in the database
+    user_stats = User.subscription_stats()
+
     # Get screening results and convert to dictionaries
-    stock_screenings = StockScreening.get_all() or []
+    total_screenings = StockScreening.count()
     screenings_data = []
-    for screening in stock_screenings[:5]:  # Show latest 5
+    for screening in StockScreening.get_recent(5):  # Show latest 5
         screenings_data.append({
             'id': screening.id,
             'name': screening.name,
@@ -96,9 +104,11 @@ def dashboard():
     
     # Get pending subscription requests
     pending_requests = SubscriptionRequest.get_pending() or []
+    user_ids = {r.user_id for r in pending_requests}
+    users_map = User.get_by_ids(user_ids)
     requests_data = []
     for request in pending_requests:
-        user = User.get(request.user_id)
+        user = users_map.get(request.user_id)
         requests_data.append({
             'id': request.id,
             'user_email': user.email if user else 'Unknown',
@@ -110,23 +120,28 @@ def dashboard():
         })
     
     stats = {
-        'total_users': total_users,
-        'admin_users': admin_users,
-        'regular_users': regular_users,
-        'free_users': free_users,
-        'medium_users': medium_users,
-        'pro_users': pro_users,
-        'total_screenings': len(stock_screenings),
+        'total_users': user_stats['total'],
+        'admin_users': user_stats['admin'],
+        'regular_users': user_stats['regular'],
+        'free_users': user_stats['free'],
+        'medium_users': user_stats['medium'],
+        'pro_users': user_stats['pro'],
+        'total_screenings': total_screenings,
         'pending_requests': len(pending_requests)
     }
-    
+
+    return {
+        'stats': stats,
+        'screenings': screenings_data,
+        'subscription_requests': requests_data
+    }
+
+@admin_bp.route('/dashboard')
+@admin_required
+def dashboard():
+    """Admin dashboard - serves React SPA with data"""
     # Serve React SPA with admin data embedded
-    return render_template('spa.html', 
-                         admin_data={
-                             'stats': stats, 
-                             'screenings': screenings_data,
-                             'subscription_requests': requests_data
-                         })
+    return render_template('spa.html', admin_data=_build_admin_dashboard_data())
 
 @admin_bp.route('/users')
 @admin_required
@@ -143,14 +158,15 @@ def update_user_subscription(user_id):
     new_tier = data.get('tier')
     
     if not user_id or new_tier not in ['free', 'medium', 'pro']:
-        return jsonify({'error': 'Invalid data'}), 400
+        return ojsonify({'error': 'Invalid data'}), 400
     
     user = User.get(user_id)
     if not user:
-        return jsonify({'error': 'User not found'}), 404
+        return ojsonify({'error': 'User not found'}), 404
     
     user.update_subscription(new_tier)
-    return jsonify({'success': True, 'message': f'Updated {user.email} to {new_tier} tier'})
+    _invalidate_dashboard_cache()
+    return ojsonify({'success': True, 'message': f'Updated {user.email} to {new_tier} tier'})
 
 @admin_bp.route('/users/<user_id>/delete', methods=['POST'])
 @admin_required
@@ -159,20 +175,21 @@ def delete_user(user_id):
     
     user = User.get(user_id)
     if not user:
-        return jsonify({'error': 'User not found'}), 404
+        return ojsonify({'error': 'User not found'}), 404
     
     if user.is_admin:
-        return jsonify({'error': 'Cannot delete admin users'}), 403
+        return ojsonify({'error': 'Cannot delete admin users'}), 403
     
     # Delete user (cascades to watchlists)
     try:
         from app import db
         db.session.delete(user)
         db.session.commit()
-        return jsonify({'success': True, 'message': f'Deleted user {user.email}'})
+        _invalidate_dashboard_cache()
+        return ojsonify({'success': True, 'message': f'Deleted user {user.email}'})
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
 @admin_bp.route('/users/<user_id>/add-subscription', methods=['POST'])
 @admin_required
@@ -183,10 +200,11 @@ def add_user_subscription(user_id):
     
     user = User.get(user_id)
     if not user:
-        return jsonify({'error': 'User not found'}), 404
+        return ojsonify({'error': 'User not found'}), 404
     
     user.update_subscription(subscription_tier)
-    return jsonify({'success': True, 'message': f'Added {subscription_tier} subscription to {user.email}'})
+    _invalidate_dashboard_cache()
+    return ojsonify({'success': True, 'message': f'Added {subscription_tier} subscription to {user.email}'})
 
 @admin_bp.route('/users/<user_id>/remove-subscription', methods=['POST'])
 @admin_required
@@ -194,48 +212,64 @@ def remove_user_subscription(user_id):
     """Remove user subscription (downgrade to free)"""
     user = User.get(user_id)
     if not user:
-        return jsonify({'error': 'User not found'}), 404
+        return ojsonify({'error': 'User not found'}), 404
     
     user.update_subscription('free')
-    return jsonify({'success': True, 'message': f'Removed subscription from {user.email} (now free tier)'})
+    _invalidate_dashboard_cache()
+    return ojsonify({'success': True, 'message': f'Removed subscription from {user.email} (now free tier)'})
 
 @admin_bp.route('/stocks/update', methods=['POST'])
 @admin_required
 def update_stocks():
     """Update stock data for all users"""
+    from app import db
     try:
-        from data_service import MarketDataService
-        
-        # Get all user watchlists
-        all_watchlists = Watchlist.query.all()
+        # An explicit refresh should bypass the TTL cache; the unique-symbol
+        # dedup below still fetches each symbol only once
+        MarketDataService.clear_stock_cache()
+
+        # Get all user watchlists with owners eager-loaded (avoids per-row lazy SELECTs)
+        all_watchlists = Watchlist.query.options(selectinload(Watchlist.user)).all()
         updated_count = 0
-        
+
+        # Fetch each unique symbol once, in parallel (the calls are network-bound)
+        all_symbols = list({stock.get('symbol')
+                            for watchlist in all_watchlists
+                            for stock in watchlist.stocks
+                            if stock.get('symbol')})
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            fresh_map = dict(zip(all_symbols, executor.map(MarketDataService.get_stock_data, all_symbols)))
+
         for watchlist in all_watchlists:
             stocks = watchlist.stocks
             updated_stocks = []
-            
+
             for stock in stocks:
                 # Get fresh stock data
-                fresh_data = MarketDataService.get_stock_data(stock.get('symbol'))
+                fresh_data = fresh_map.get(stock.get('symbol'))
                 if fresh_data:
-                    # Keep existing buy_point if it exists
+                    # Copy the shared entry, keeping the existing buy_point if it exists
+                    fresh_data = dict(fresh_data)
                     fresh_data['buy_point'] = stock.get('buy_point', fresh_data.get('buy_point'))
                     updated_stocks.append(fresh_data)
                 else:
                     updated_stocks.append(stock)  # Keep old data if fresh data unavailable
             
             watchlist.stocks = updated_stocks
-            watchlist.save()
             updated_count += 1
-        
-        return jsonify({
-            'success': True, 
+
+        # One commit for the whole batch instead of a transaction per watchlist
+        db.session.commit()
+
+        return ojsonify({
+            'success': True,
             'message': f'Updated stocks in {updated_count} watchlists',
             'updated_watchlists': updated_count
         })
-    
+
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        db.session.rollback()
+        return ojsonify({'error': str(e)}), 500
 
 @admin_bp.route('/watchlists/user/<user_id>', methods=['GET'])
 @admin_required
@@ -243,7 +277,7 @@ def get_user_watchlists(user_id):
     """Get watchlists for a specific user"""
     user = User.get(user_id)
     if not user:
-        return jsonify({'error': 'User not found'}), 404
+        return ojsonify({'error': 'User not found'}), 404
     
     watchlists = Watchlist.get_by_user(user_id)
     watchlists_data = []
@@ -255,11 +289,11 @@ def get_user_watchlists(user_id):
             'type': watchlist.watchlist_type,
             'stocks': watchlist.stocks,
             'stock_count': len(watchlist.stocks),
-            'created_at': watchlist.created_at.isoformat(),
-            'updated_at': watchlist.updated_at.isoformat()
+            'created_at': watchlist.created_at,
+            'updated_at': watchlist.updated_at
         })
     
-    return jsonify({
+    return ojsonify({
         'success': True,
         'user': {'email': user.email, 'full_name': user.full_name},
         'watchlists': watchlists_data
@@ -273,32 +307,31 @@ def add_stock_to_watchlist(watchlist_id):
     symbol = data.get('symbol')
     
     if not symbol:
-        return jsonify({'error': 'Stock symbol is required'}), 400
+        return ojsonify({'error': 'Stock symbol is required'}), 400
     
     watchlist = Watchlist.get(watchlist_id)
     if not watchlist:
-        return jsonify({'error': 'Watchlist not found'}), 404
+        return ojsonify({'error': 'Watchlist not found'}), 404
     
     # Get stock data
-    from data_service import MarketDataService
-    stock_data = MarketDataService.get_stock_data(symbol.upper())
-    
+    symbol_upper = symbol.upper()
+    stock_data = MarketDataService.get_stock_data(symbol_upper)
+
     if not stock_data:
-        return jsonify({'error': f'Could not find data for {symbol}'}), 400
-    
-    # Check if stock already exists
-    existing_stocks = watchlist.stocks
-    for stock in existing_stocks:
-        if stock.get('symbol') == symbol.upper():
-            return jsonify({'error': f'{symbol} already exists in this watchlist'}), 400
-    
+        return ojsonify({'error': f'Could not find data for {symbol}'}), 400
+
+    # Check if stock already exists (set membership instead of a linear scan)
+    existing_symbols = {stock.get('symbol') for stock in watchlist.stocks}
+    if symbol_upper in existing_symbols:
+        return ojsonify({'error': f'{symbol} already exists in this watchlist'}), 400
+
     # Add stock
     watchlist.add_stock(stock_data)
     watchlist.save()
     
-    return jsonify({
+    return ojsonify({
         'success': True,
-        'message': f'Added {symbol.upper()} to {watchlist.name}',
+        'message': f'Added {symbol_upper} to {watchlist.name}',
         'stock': stock_data
     })
 
@@ -310,17 +343,17 @@ def remove_stock_from_watchlist(watchlist_id):
     symbol = data.get('symbol')
     
     if not symbol:
-        return jsonify({'error': 'Stock symbol is required'}), 400
+        return ojsonify({'error': 'Stock symbol is required'}), 400
     
     watchlist = Watchlist.get(watchlist_id)
     if not watchlist:
-        return jsonify({'error': 'Watchlist not found'}), 404
+        return ojsonify({'error': 'Watchlist not found'}), 404
     
     # Remove stock
     watchlist.remove_stock(symbol.upper())
     watchlist.save()
     
-    return jsonify({
+    return ojsonify({
         'success': True,
         'message': f'Removed {symbol.upper()} from {watchlist.name}'
     })
@@ -341,7 +374,7 @@ def create_screening():
     criteria = data.get('criteria', {})
     
     if not name:
-        return jsonify({'error': 'Screening name is required'}), 400
+        return ojsonify({'error': 'Screening name is required'}), 400
     
     # Generate mock screening results based on criteria
     mock_results = generate_mock_screening_results(criteria)
@@ -355,9 +388,10 @@ def create_screening():
     
     try:
         screening.save()
-        return jsonify({'success': True, 'screening_id': screening.id})
+        _invalidate_dashboard_cache()
+        return ojsonify({'success': True, 'screening_id': screening.id})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
 @admin_bp.route('/stock-screening/<screening_id>/update', methods=['POST'])
 @admin_required
@@ -365,18 +399,19 @@ def update_screening(screening_id):
     """Update stock screening results"""
     screening = StockScreening.get(screening_id)
     if not screening:
-        return jsonify({'error': 'Screening not found'}), 404
+        return ojsonify({'error': 'Screening not found'}), 404
     
     # Regenerate results based on current criteria
     new_results = generate_mock_screening_results(screening.criteria_data)
-    screening.results = json.dumps(new_results)
+    screening.results = orjson.dumps(new_results).decode()
     screening.updated_at = datetime.utcnow()
     
     try:
         screening.save()
-        return jsonify({'success': True, 'results': new_results})
+        _invalidate_dashboard_cache()
+        return ojsonify({'success': True, 'results': new_results})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
 @admin_bp.route('/stock-screening/<screening_id>/delete', methods=['POST'])
 @admin_required
@@ -384,32 +419,45 @@ def delete_screening(screening_id):
     """Delete stock screening"""
     screening = StockScreening.get(screening_id)
     if not screening:
-        return jsonify({'error': 'Screening not found'}), 404
+        return ojsonify({'error': 'Screening not found'}), 404
     
     try:
         screening.delete()
-        return jsonify({'success': True, 'message': f'Deleted screening {screening.name}'})
+        _invalidate_dashboard_cache()
+        return ojsonify({'success': True, 'message': f'Deleted screening {screening.name}'})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
 @admin_bp.route('/api/dashboard-data')
 @admin_required
 def api_dashboard_data():
     """API endpoint for React dashboard data"""
+    from app import db
+
+    # Version the payload by the newest user/screening change plus the row
+    # counts (so deletions invalidate it too); on an ETag match the SPA poll
+    # skips payload building and serialization entirely
+    users_version = db.session.query(db.func.max(User.updated_at), db.func.count(User.id)).one()
+    screenings_version = db.session.query(db.func.max(StockScreening.updated_at), db.func.count(StockScreening.id)).one()
+    etag = hashlib.blake2b(repr((users_version, screenings_version)).encode(), digest_size=8).hexdigest()
+    if request.if_none_match.contains(etag):
+        return '', 304
+
     sector_data = MarketDataService.get_sector_data()
-    
-    # Get user statistics
-    all_users = User.get_all_users()
+
+    # Get user statistics aggregated in the database
+    user_stats = User.subscription_stats()
+    recent_screenings = StockScreening.get_recent(10)
     stats = {
-        'total_users': len(all_users),
-        'admin_users': len([u for u in all_users if u.is_admin]),
-        'free_users': len([u for u in all_users if u.subscription_tier == 'free']),
-        'medium_users': len([u for u in all_users if u.subscription_tier == 'medium']),
-        'pro_users': len([u for u in all_users if u.subscription_tier == 'pro']),
-        'total_screenings': len(StockScreening.get_all())
+        'total_users': user_stats['total'],
+        'admin_users': user_stats['admin'],
+        'free_users': user_stats['free'],
+        'medium_users': user_stats['medium'],
+        'pro_users': user_stats['pro'],
+        'total_screenings': StockScreening.count()
     }
-    
-    return jsonify({
+
+    response = ojsonify({
         'success': True,
         'data': {
             'stats': stats,
@@ -418,36 +466,47 @@ def api_dashboard_data():
                 {
                     'id': s.id,
                     'name': s.name,
-                    'created_at': s.created_at.isoformat(),
-                    'results_count': len(s.results_data.get('stocks', []))
-                } for s in StockScreening.get_all()[:10]
+                    'created_at': s.created_at,
+                    'results_count': s.stock_count
+                } for s in recent_screenings
             ]
         }
     })
+    response.set_etag(etag)
+    return response
 
 def generate_mock_screening_results(criteria):
     """Generate mock stock screening results based on criteria"""
-    from random import randint, uniform, choice
-    
     # Mock stock symbols
-    symbols = ['AAPL', 'MSFT', 'GOOGL', 'TSLA', 'AMZN', 'NVDA', 'META', 'NFLX', 
+    symbols = ['AAPL', 'MSFT', 'GOOGL', 'TSLA', 'AMZN', 'NVDA', 'META', 'NFLX',
                'AMD', 'CRM', 'ORCL', 'IBM', 'INTC', 'CSCO', 'ADBE']
-    
-    results = []
-    num_results = randint(5, min(len(symbols), 12))
-    selected_symbols = choice(symbols[:num_results])
-    
-    for symbol in selected_symbols:
-        results.append({
-            'symbol': symbol,
-            'price': round(uniform(50, 500), 2),
-            'change_percent': round(uniform(-5, 8), 2),
-            'volume': randint(1000000, 50000000),
-            'market_cap': f"${randint(100, 2000)}B",
-            'pe_ratio': round(uniform(10, 35), 1),
-            'score': randint(60, 95)
-        })
-    
+
+    rng = np.random.default_rng()
+    num_results = int(rng.integers(5, min(len(symbols), 12), endpoint=True))
+    selected_symbols = rng.choice(symbols, num_results, replace=False)
+
+    # Draw every field for all rows at once instead of per-symbol RNG calls
+    prices = rng.uniform(50, 500, num_results).round(2)
+    changes = rng.uniform(-5, 8, num_results).round(2)
+    volumes = rng.integers(1000000, 50000000, num_results, endpoint=True)
+    market_caps = rng.integers(100, 2000, num_results, endpoint=True)
+    pe_ratios = rng.uniform(10, 35, num_results).round(1)
+    scores = rng.integers(60, 95, num_results, endpoint=True)
+
+    results = [
+        {
+            'symbol': str(symbol),
+            'price': float(price),
+            'change_percent': float(change),
+            'volume': int(volume),
+            'market_cap': f"${int(cap)}B",
+            'pe_ratio': float(pe),
+            'score': int(score)
+        }
+        for symbol, price, change, volume, cap, pe, score
+        in zip(selected_symbols, prices, changes, volumes, market_caps, pe_ratios, scores)
+    ]
+
     return {
         'stocks': results,
         'total_found': len(results),
@@ -459,20 +518,25 @@ def generate_mock_screening_results(criteria):
 @admin_required
 def api_users():
     """API endpoint for user management"""
-    all_users = User.get_all_users()
-    users_data = []
-    for user in all_users:
-        users_data.append({
-            'id': user.id,
-            'email': user.email,
-            'full_name': user.full_name,
-            'subscription_tier': user.subscription_tier,
-            'is_admin': user.is_admin,
-            'created_at': user.created_at.isoformat(),
-            'updated_at': user.updated_at.isoformat()
-        })
-    
-    return jsonify({'success': True, 'users': users_data})
+    def generate():
+        # Stream users in batches so memory stays flat for large user tables
+        yield '{"success": true, "users": ['
+        first = True
+        for user in User.query.yield_per(500):
+            row = orjson.dumps({
+                'id': user.id,
+                'email': user.email,
+                'full_name': user.full_name,
+                'subscription_tier': user.subscription_tier,
+                'is_admin': user.is_admin,
+                'created_at': user.created_at,
+                'updated_at': user.updated_at
+            }).decode()
+            yield row if first else ',' + row
+            first = False
+        yield ']}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
 
 @admin_bp.route('/api/stock-screenings')
 @admin_required 
@@ -486,11 +550,11 @@ def api_stock_screenings():
             'name': screening.name,
             'criteria_data': screening.criteria_data,
             'results_data': screening.results_data,
-            'created_at': screening.created_at.isoformat(),
-            'updated_at': screening.updated_at.isoformat()
+            'created_at': screening.created_at,
+            'updated_at': screening.updated_at
         })
     
-    return jsonify({'success': True, 'screenings': screenings_data})
+    return ojsonify({'success': True, 'screenings': screenings_data})
 
 @admin_bp.route('/subscription-requests/<request_id>/approve', methods=['POST'])
 @admin_required
@@ -498,15 +562,16 @@ def approve_subscription_request(request_id):
     """Approve a subscription request"""
     request = SubscriptionRequest.query.get(request_id)
     if not request:
-        return jsonify({'error': 'Request not found'}), 404
+        return ojsonify({'error': 'Request not found'}), 404
     
     if request.status != 'pending':
-        return jsonify({'error': 'Request already processed'}), 400
+        return ojsonify({'error': 'Request already processed'}), 400
     
     request.approve()
+    _invalidate_dashboard_cache()
     user = User.get(request.user_id)
     
-    return jsonify({
+    return ojsonify({
         'success': True,
         'message': f'Approved {user.email}\'s upgrade to {request.requested_tier}'
     })
@@ -517,15 +582,16 @@ def reject_subscription_request(request_id):
     """Reject a subscription request"""
     request = SubscriptionRequest.query.get(request_id)
     if not request:
-        return jsonify({'error': 'Request not found'}), 404
+        return ojsonify({'error': 'Request not found'}), 404
     
     if request.status != 'pending':
-        return jsonify({'error': 'Request already processed'}), 400
+        return ojsonify({'error': 'Request already processed'}), 400
     
     request.reject()
+    _invalidate_dashboard_cache()
     user = User.get(request.user_id)
     
-    return jsonify({
+    return ojsonify({
         'success': True,
         'message': f'Rejected {user.email}\'s upgrade request'
     })
@@ -30,6 +30,28 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
 db = SQLAlchemy(model_class=Base)
 db.init_app(app)
 
+# Query counter: flags routes that issue suspiciously many queries so N+1
+# regressions show up in the request log. The warning is gated on app.debug
+# at request time because debug mode is only enabled inside app.run()
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QUERY_COUNT_WARN_THRESHOLD = 10
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_queries(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.query_count = getattr(g, "query_count", 0) + 1
+
+@app.after_request
+def _log_query_count(response):
+    if app.debug:
+        query_count = getattr(g, "query_count", 0)
+        if query_count > QUERY_COUNT_WARN_THRESHOLD:
+            logging.warning(f"{request.path} issued {query_count} SQL queries")
+    return response
+
 # Configure Flask-Login
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -40,7 +62,9 @@ login_manager.login_message_category = 'info'
 @login_manager.user_loader
 def load_user(user_id):
     from models import User
-    return User.get(user_id)
+    # session.get() serves repeat lookups from the identity map without a query;
+    # is_admin is a plain column, so no relationships need eager-loading here
+    return db.session.get(User, user_id)
 
 # Set up OAuth blueprints
 from oauth_config import create_oauth_blueprints, setup_oauth_handlers
@@ -76,3 +100,19 @@ from routes import *
 with app.app_context():
     db.create_all()
     logging.info("Database tables created successfully")
+
+    # db.create_all() only creates missing tables, never alters existing ones,
+    # so add columns introduced after a deployment's schema was first created
+    from sqlalchemy import inspect, text
+    inspector = inspect(db.engine)
+    screening_columns = {col['name'] for col in inspector.get_columns('stock_screenings')}
+    if 'results_stock_count' not in screening_columns:
+        db.session.execute(text('ALTER TABLE stock_screenings ADD COLUMN results_stock_count INTEGER'))
+        db.session.commit()
+        logging.info("Added stock_screenings.results_stock_count column")
+
+    # Indexes on pre-existing tables are skipped by db.create_all() as well;
+    # create any declared on the models that are still missing
+    for table in db.metadata.tables.values():
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
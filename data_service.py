@@ -1,5 +1,13 @@
 import random
 from datetime import datetime, timedelta
+from threading import Lock
+
+from cachetools import TTLCache, cached
+
+# Per-symbol quote cache: market data changes slowly relative to how often the
+# dashboard refreshes, so repeated lookups within the TTL skip the fetch entirely
+_stock_cache = TTLCache(maxsize=4096, ttl=60)
+_stock_cache_lock = Lock()
 
 class MarketDataService:
     """Service to generate mock financial data for the platform"""
@@ -90,6 +98,7 @@ class MarketDataService:
         return sector_data
 
     @staticmethod
+    @cached(_stock_cache, lock=_stock_cache_lock)
     def get_stock_data(symbol):
         """Get individual stock data"""
         if symbol not in MarketDataService.COMPANY_NAMES:
@@ -122,6 +131,12 @@ class MarketDataService:
             'country': 'USA'
         }
 
+    @staticmethod
+    def clear_stock_cache():
+        """Drop cached stock data so the next lookup fetches fresh quotes"""
+        with _stock_cache_lock:
+            _stock_cache.clear()
+
     @staticmethod
     def get_watchlist_stocks(symbols):
         """Get stock data for a list of symbols"""
@@ -129,7 +144,9 @@ class MarketDataService:
         for symbol in symbols:
             stock_data = MarketDataService.get_stock_data(symbol)
             if stock_data:
-                # Add buy point for watchlist display
+                # Copy the cached entry before adding the buy point for
+                # watchlist display, so the shared cache dict stays untouched
+                stock_data = dict(stock_data)
                 stock_data['buy_point'] = round(stock_data['price'] * random.uniform(0.9, 1.1), 2)
                 stocks.append(stock_data)
         return stocks
@@ -10,18 +10,21 @@ def init_models(db):
     
     class User(UserMixin, db.Model):
         __tablename__ = 'users'
-        
+        # Admins are a tiny fraction of users; the partial index (Postgres) makes
+        # the admin-count aggregate a small index scan
+        __table_args__ = (db.Index('ix_users_is_admin', 'is_admin', postgresql_where=db.text('is_admin')),)
+
         id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
         email = db.Column(db.String(120), unique=True, nullable=False)
         full_name = db.Column(db.String(100), nullable=True)
         password_hash = db.Column(db.String(256), nullable=True)
-        subscription_tier = db.Column(db.String(20), default='free')
+        subscription_tier = db.Column(db.String(20), default='free', index=True)
         is_admin = db.Column(db.Boolean, default=False)  # Admin flag
         created_at = db.Column(db.DateTime, default=datetime.utcnow)
         updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
         
         # Relationship to watchlists
-        watchlists = db.relationship('Watchlist', backref='user', lazy=True, cascade='all, delete-orphan')
+        watchlists = db.relationship('Watchlist', back_populates='user', lazy=True, cascade='all, delete-orphan')
 
         def __init__(self, email, password=None, full_name=None, is_admin=False, **kwargs):
             super().__init__(**kwargs)
@@ -58,6 +61,30 @@ def init_models(db):
         def get_all_users():
             """Get all users for admin management"""
             return User.query.all()
+
+        @staticmethod
+        def subscription_stats():
+            """Aggregate user counts by admin flag and tier in one grouped query"""
+            rows = db.session.query(
+                User.is_admin, User.subscription_tier, db.func.count(User.id)
+            ).group_by(User.is_admin, User.subscription_tier).all()
+            stats = {'total': 0, 'admin': 0, 'free': 0, 'medium': 0, 'pro': 0}
+            for is_admin, tier, count in rows:
+                stats['total'] += count
+                if is_admin:
+                    stats['admin'] += count
+                if tier in stats:
+                    stats[tier] += count
+            stats['regular'] = stats['total'] - stats['admin']
+            return stats
+
+        @staticmethod
+        def get_by_ids(user_ids):
+            """Get users for a collection of ids as a dict keyed by id"""
+            if not user_ids:
+                return {}
+            users = User.query.filter(User.id.in_(user_ids)).all()
+            return {user.id: user for user in users}
         
         @staticmethod
         def create_admin(email, password, full_name=None):
@@ -93,6 +120,9 @@ def init_models(db):
         created_at = db.Column(db.DateTime, default=datetime.utcnow)
         updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+        # Relationship to owning user
+        user = db.relationship('User', back_populates='watchlists')
+
         def __init__(self, name, user_id, watchlist_type='normal', **kwargs):
             super().__init__(**kwargs)
             self.name = name
@@ -154,7 +184,10 @@ def init_models(db):
     
     class SubscriptionRequest(db.Model):
         __tablename__ = 'subscription_requests'
-        
+        # get_pending() filters on status and orders by created_at; the composite
+        # index turns that from a full-table scan into a B-tree seek
+        __table_args__ = (db.Index('ix_subscription_requests_status_created_at', 'status', 'created_at'),)
+
         id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
         user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
         requested_tier = db.Column(db.String(20), nullable=False)  # 'medium' or 'pro'
@@ -220,6 +253,7 @@ def init_models(db):
         name = db.Column(db.String(100), nullable=False)
         criteria = db.Column(db.Text, nullable=False)  # JSON string for screening criteria
         results = db.Column(db.Text, nullable=False)   # JSON string for screening results
+        results_stock_count = db.Column(db.Integer, nullable=True)  # denormalized len(results['stocks'])
         created_by = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
         created_at = db.Column(db.DateTime, default=datetime.utcnow)
         updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -246,20 +280,38 @@ def init_models(db):
                 return json.loads(self.results or '{}')
             except (json.JSONDecodeError, TypeError):
                 return {}
-        
+
+        @property
+        def stock_count(self):
+            """Number of stocks in results, without re-parsing the JSON once precomputed"""
+            if self.results_stock_count is not None:
+                return self.results_stock_count
+            return len(self.results_data.get('stocks', []))
+
         def save(self):
             try:
+                self.results_stock_count = len(self.results_data.get('stocks', []))
                 db.session.add(self)
                 db.session.commit()
                 return self
             except Exception as e:
                 db.session.rollback()
                 raise e
-        
+
         @staticmethod
         def get_all():
             return StockScreening.query.order_by(StockScreening.created_at.desc()).all()
-        
+
+        @staticmethod
+        def get_recent(limit):
+            """Get the most recently created screenings, limited at the SQL layer"""
+            return StockScreening.query.order_by(StockScreening.created_at.desc()).limit(limit).all()
+
+        @staticmethod
+        def count():
+            """Count screenings without loading any rows"""
+            return db.session.query(db.func.count(StockScreening.id)).scalar()
+
         @staticmethod
         def get(screening_id):
             return StockScreening.query.filter_by(id=screening_id).first()